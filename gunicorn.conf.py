@@ -0,0 +1,22 @@
+"""
+Gunicorn settings picked up automatically from the working directory.
+
+Starts the OpenSky poller in each worker after it forks, instead of as a side effect of
+importing the app. Under gunicorn the workers share results through SHARED_CACHE_DIR
+(default /dev/shm) and elect a single poller between them, so adding workers doesn't
+multiply OpenSky traffic.
+"""
+
+import os
+import tempfile
+
+# Set here, before the workers fork and import plane_tracker, so every worker inherits it
+os.environ.setdefault(
+    "SHARED_CACHE_DIR", "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+)
+
+
+def post_fork(server, worker):
+    from plane_tracker import start_poller
+
+    start_poller()
@@ -0,0 +1,879 @@
+"""
+Tracks aircraft over Turkey that are flying from/to Israel:
+ - Uses OpenSky API with direct HTTP requests (no external client library needed)
+ - Polls for aircraft over Turkey and checks recent flights for Israeli airports (requires auth)
+ - Keeps the latest results, pre-serialized, for the web app in app.py
+
+Requires Python 3.10+.
+
+Env vars:
+  OPENSKY_USERNAME, OPENSKY_PASSWORD   (recommended; needed for flights endpoints)
+  POLL_INTERVAL                        (default 20s)
+  RECENT_WINDOW_HOURS                  (default 6h)
+  MAX_AIRCRAFT_TO_QUERY                (default 120)
+  OPENSKY_WORKERS                      (default 10 concurrent flight lookups)
+  FLIGHT_CACHE_TTL                     (default 300s per-aircraft flight history cache)
+  SHARED_CACHE_DIR                     (unset = no sharing; where workers share results, elect one poller)
+  AIRSPACE_POLYGON                     (optional "lon,lat;lon,lat;..." outline refining the bounding box)
+"""
+
+import time
+from datetime import datetime, timezone
+from threading import Event, Lock, Thread
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from collections import defaultdict, namedtuple
+from itertools import chain
+import os
+import logging
+import random
+import gzip
+import fcntl
+import tempfile
+import hashlib
+
+import numpy as np
+import orjson
+import requests
+from cachetools import TTLCache
+from requests.adapters import HTTPAdapter
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional; the NumPy ray cast is used instead
+    njit = None
+
+# ===== CONFIG =====
+OPENSKY_USERNAME = os.getenv("OPENSKY_USERNAME")
+OPENSKY_PASSWORD = os.getenv("OPENSKY_PASSWORD")
+POLL_INTERVAL = int(os.getenv("POLL_INTERVAL", "20"))
+RECENT_WINDOW_HOURS = int(os.getenv("RECENT_WINDOW_HOURS", "6"))
+MAX_AIRCRAFT_TO_QUERY = int(os.getenv("MAX_AIRCRAFT_TO_QUERY", "120"))
+OPENSKY_WORKERS = int(os.getenv("OPENSKY_WORKERS", "10"))
+FLIGHT_CACHE_TTL = int(os.getenv("FLIGHT_CACHE_TTL", "300"))
+AIRSPACE_POLYGON = os.getenv("AIRSPACE_POLYGON", "")
+
+# Upper bound on aircraft whose flight history is cached at once
+FLIGHT_CACHE_SIZE = 4096
+
+# Opt-in: web workers on one host share the published results through a file in this
+# directory, and a lock file makes sure only one of them polls OpenSky. File names are
+# namespaced by OpenSky account, so deployments with different credentials (or in the
+# unauthenticated fallback mode) never elect a poller together or serve each other's results.
+SHARED_CACHE_DIR = os.getenv("SHARED_CACHE_DIR", "")
+_SHARED_NAMESPACE = hashlib.sha256((OPENSKY_USERNAME or "").encode()).hexdigest()[:12]
+SHARED_CACHE_FILE = (
+    os.path.join(SHARED_CACHE_DIR, f"plane_tracker_{_SHARED_NAMESPACE}.json") if SHARED_CACHE_DIR else None
+)
+POLLER_LOCK_FILE = (
+    os.path.join(SHARED_CACHE_DIR, f"plane_tracker_{_SHARED_NAMESPACE}.lock") if SHARED_CACHE_DIR else None
+)
+
+# Cached JSON bodies at least this large are also kept gzipped
+COMPRESS_MIN_SIZE = 500
+COMPRESS_LEVEL = 6
+
+# Retry/backoff for OpenSky calls (seconds) and circuit breaker tuning
+RETRY_ATTEMPTS = 3
+RETRY_BASE = 0.5
+RETRY_CAP = 8.0
+BREAKER_THRESHOLD = 5
+BREAKER_RECOVERY = 30.0
+RETRY_STATUSES = {429, 502, 503, 504}
+
+# Seconds a forced refresh waits on a rebuild already in progress
+REBUILD_WAIT_TIMEOUT = 30
+
+# OpenSky rejects /flights/all intervals longer than two hours
+FLIGHTS_INTERVAL_MAX = 2 * 3600
+
+# Seconds to stop trying /flights/all after it fails or comes back empty
+BULK_FAILURE_COOLDOWN = 300
+
+# Request timeouts (seconds); a /flights/all slice is a far larger download than other calls
+REQUEST_TIMEOUT = 10
+BULK_REQUEST_TIMEOUT = 30
+
+# Refuse OpenSky bodies larger than this rather than buffering them whole
+MAX_RESPONSE_BYTES = 64 * 1024 * 1024
+RESPONSE_CHUNK_SIZE = 64 * 1024
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Turkey bounding box as plain floats. Used both for server-side filtering in OpenSky API
+# and for the local containment test, since our airspace is a rectangle.
+LAT_MIN, LAT_MAX, LON_MIN, LON_MAX = 35.0, 42.5, 25.0, 45.5
+
+# OpenSky API endpoints
+OPENSKY_BASE_URL = "https://opensky-network.org/api"
+
+# Aircraft over Turkey as parallel NumPy arrays, one row per aircraft (struct-of-arrays)
+Aircraft = namedtuple("Aircraft", [
+    "icao24", "callsign", "origin_country", "lon", "lat", "altitude", "velocity", "heading",
+])
+
+# ICAO prefix helper: Israeli airports start with "LL"
+# OpenSky always reports ICAO codes in uppercase, so skip the .upper() copy on this hot path
+ISRAEL_PREFIX = "LL"
+
+
+def is_israel_airport(icao: str | None) -> bool:
+    return icao is not None and icao[:2] == ISRAEL_PREFIX
+
+# Israeli airports for reference
+ISRAELI_AIRPORTS = {
+    'LLBG': 'Ben Gurion Airport',
+    'LLIA': 'Ramon Airport', 
+    'LLIB': 'Ovda Airport',
+    'LLHB': 'Haifa Airport',
+    'LLMZ': 'Tel Aviv (Sde Dov)',
+    'LLES': 'Eilat Airport'
+}
+
+# ICAO designators of Israeli airlines, as they appear at the start of callsigns
+ISRAEL_CARRIER_PREFIXES = {
+    'ELY': 'El Al',
+    'ISR': 'Israir',
+    'AIZ': 'Arkia',
+    'ERO': "Sun d'Or",
+}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling OpenSky while the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker: closed -> open -> half-open -> closed.
+
+    After `threshold` consecutive failures the circuit opens and calls are refused for
+    `recovery` seconds; then a probe is let through and its outcome closes or re-opens it.
+    """
+
+    def __init__(self, threshold: int = 5, recovery: float = 30.0):
+        self.threshold = threshold
+        self.recovery = recovery
+        self.state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._lock = Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+            now = time.time()
+            if now - self._opened_at < self.recovery:
+                return False
+            # Half-open: admit one probe per recovery period until an outcome is recorded
+            self.state = "half-open"
+            self._opened_at = now
+            return True
+
+    def record_success(self):
+        with self._lock:
+            if self.state != "closed":
+                logger.info("OpenSky circuit breaker closed")
+            self.state = "closed"
+            self._failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self.state == "half-open" or self._failures >= self.threshold:
+                if self.state == "closed":
+                    logger.warning(f"OpenSky circuit breaker opened after {self._failures} failures")
+                self.state = "open"
+                self._opened_at = time.time()
+
+
+def backoff_delay(attempt: int) -> float:
+    """Jittered exponential backoff so concurrent workers don't retry in lockstep."""
+    return min(RETRY_CAP, RETRY_BASE * 2 ** attempt) * random.uniform(0.5, 1.0)
+
+
+def parse_polygon(spec: str) -> tuple[np.ndarray, np.ndarray] | None:
+    """Parse a "lon,lat;lon,lat;..." outline into vertex arrays; None when unset."""
+    if not spec.strip():
+        return None
+    vertices = []
+    for n, point in enumerate((p for p in spec.split(";") if p.strip()), start=1):
+        values = point.split(",")
+        try:
+            if len(values) != 2:
+                raise ValueError
+            vertices.append((float(values[0]), float(values[1])))
+        except ValueError:
+            raise ValueError(
+                f"AIRSPACE_POLYGON vertex {n} must be two numbers 'lon,lat', got {point.strip()!r}"
+            ) from None
+    if len(vertices) < 3:
+        raise ValueError(f"AIRSPACE_POLYGON needs at least 3 vertices, got {len(vertices)}")
+    poly = np.array(vertices, dtype=np.float64)
+    return np.ascontiguousarray(poly[:, 0]), np.ascontiguousarray(poly[:, 1])
+
+
+def points_in_polygon_numpy(lons: np.ndarray, lats: np.ndarray,
+                            poly_lons: np.ndarray, poly_lats: np.ndarray) -> np.ndarray:
+    """Even-odd ray cast, vectorized over points: one pass of array ops per polygon edge."""
+    inside = np.zeros(lons.shape[0], dtype=np.bool_)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for j in range(poly_lons.shape[0]):
+            x1, y1 = poly_lons[j - 1], poly_lats[j - 1]
+            x2, y2 = poly_lons[j], poly_lats[j]
+            # Edges the eastward ray from each point crosses (horizontal edges never qualify)
+            crosses = (y1 > lats) != (y2 > lats)
+            inside ^= crosses & (lons < x1 + (lats - y1) * (x2 - x1) / (y2 - y1))
+    return inside
+
+
+def points_in_polygon_loop(lons, lats, poly_lons, poly_lats):
+    """Even-odd ray cast as plain loops, for numba to compile."""
+    n, m = lons.shape[0], poly_lons.shape[0]
+    inside = np.zeros(n, dtype=np.bool_)
+    for i in range(n):
+        x, y = lons[i], lats[i]
+        hit = False
+        for j in range(m):
+            x1, y1 = poly_lons[j - 1], poly_lats[j - 1]
+            x2, y2 = poly_lons[j], poly_lats[j]
+            if (y1 > y) != (y2 > y) and x < x1 + (y - y1) * (x2 - x1) / (y2 - y1):
+                hit = not hit
+        inside[i] = hit
+    return inside
+
+
+# Compiled lazily on first use (only reached when a polygon is configured). Serial on purpose:
+# only the handful of aircraft inside the bbox are tested, too few to pay for threads.
+_compiled_ray_cast = njit(cache=True)(points_in_polygon_loop) if njit is not None else None
+
+
+def points_in_polygon(lons: np.ndarray, lats: np.ndarray,
+                      poly_lons: np.ndarray, poly_lats: np.ndarray) -> np.ndarray:
+    """Ray cast with numba when available, falling back to NumPy if compiling or running it fails."""
+    global _compiled_ray_cast
+    if _compiled_ray_cast is not None:
+        try:
+            return _compiled_ray_cast(lons, lats, poly_lons, poly_lats)
+        except Exception as e:
+            logger.warning(f"numba ray cast failed, using the NumPy version instead: {e}")
+            _compiled_ray_cast = None
+    return points_in_polygon_numpy(lons, lats, poly_lons, poly_lats)
+
+
+# Optional outline within the bounding box, as (lons, lats) vertex arrays
+_airspace_polygon = parse_polygon(AIRSPACE_POLYGON)
+
+
+def airspace_outline() -> list[list[float]]:
+    """The airspace as [lon, lat] vertices: the configured polygon, or the bounding box."""
+    if _airspace_polygon is not None:
+        return np.column_stack(_airspace_polygon).tolist()
+    return [[LON_MIN, LAT_MIN], [LON_MAX, LAT_MIN], [LON_MAX, LAT_MAX], [LON_MIN, LAT_MAX]]
+
+
+# Long-lived pool for OpenSky lookups, so polls don't spawn and join fresh threads each time;
+# every caller (poller and forced refreshes) shares it, so it also caps in-flight requests
+_executor = ThreadPoolExecutor(max_workers=OPENSKY_WORKERS, thread_name_prefix="opensky")
+
+# Per-aircraft flight history, icao24 -> Israel flights; history barely moves between polls
+# TTLCache expires entries itself and caps memory however many aircraft pass through
+_flight_cache: TTLCache = TTLCache(maxsize=FLIGHT_CACHE_SIZE, ttl=FLIGHT_CACHE_TTL)
+_flight_cache_lock = Lock()
+
+_breaker = CircuitBreaker(BREAKER_THRESHOLD, BREAKER_RECOVERY)
+
+# One keep-alive connection pool shared by all lookups and reused across polls,
+# so each request doesn't pay a fresh TCP + TLS handshake to OpenSky
+_session = requests.Session()
+_session.mount("https://", HTTPAdapter(pool_maxsize=OPENSKY_WORKERS))
+# Credentials and User-Agent are set once on the session rather than rebuilt per request
+if OPENSKY_USERNAME and OPENSKY_PASSWORD:
+    _session.auth = (OPENSKY_USERNAME, OPENSKY_PASSWORD)
+_session.headers["User-Agent"] = "Israel-Turkey-Flight-Tracker/1.0"
+
+# Last bulk flights-in-window result, reused for one poll interval; after a failed or empty
+# bulk query, failed_until skips straight to per-aircraft lookups for BULK_FAILURE_COOLDOWN
+_bulk_flights = {"ts": 0, "by_icao": None, "failed_until": 0}
+_bulk_flights_lock = Lock()
+
+# OpenSky's `time` for the last states snapshot we matched, and the matches it produced
+_last_states = {"time": None, "results": None}
+
+
+def serialize_flights(ts: float, results: list[dict]) -> bytes:
+    """Encode the /api/turkey-israel-flights body once per update instead of once per request."""
+    return orjson.dumps({
+        "fetched_at": int(ts),
+        "count": len(results),
+        "results": results,
+        "last_update": datetime.fromtimestamp(ts, timezone.utc).isoformat() if ts else None
+    }, option=orjson.OPT_SERIALIZE_NUMPY)
+
+
+def serialize_simple_flights(ts: float, results: list[dict]) -> bytes:
+    """Encode the /api/flights body (the original simple format) once per update."""
+    flights = [{
+        "icao": result["icao24"],
+        "callsign": result["callsign"],
+        "lat": result["lat"],
+        "lon": result["lon"],
+        "altitude": result["altitude"],
+        "speed": result["speed"],
+        "heading": result["heading"],
+        "timestamp": result["timestamp"],
+        "last_seen": result["last_seen"]
+    } for result in results]
+    return orjson.dumps({
+        "flights": flights,
+        "count": len(flights),
+        "last_update": datetime.fromtimestamp(ts, timezone.utc).isoformat() if ts else None,
+        "bounds": {
+            "north": LAT_MAX,
+            "south": LAT_MIN,
+            "east": LON_MAX,
+            "west": LON_MIN,
+            # The exact outline tested when AIRSPACE_POLYGON is set, as [lon, lat] vertices
+            "polygon": airspace_outline() if _airspace_polygon is not None else None
+        }
+    }, option=orjson.OPT_SERIALIZE_NUMPY)
+
+
+def gzip_body(body: bytes) -> bytes | None:
+    """Pre-compress a cached body once so requests that accept gzip cost no CPU."""
+    return gzip.compress(body, COMPRESS_LEVEL) if len(body) >= COMPRESS_MIN_SIZE else None
+
+
+# Published results are an immutable snapshot replaced by a single rebinding, so
+# readers never lock and always see ts, results and bodies from the same update
+CacheSnapshot = namedtuple("CacheSnapshot", [
+    "ts", "results", "json_bytes", "json_gz", "simple_json_bytes", "simple_json_gz",
+])
+
+_cache = CacheSnapshot(0, [], serialize_flights(0, []), None, serialize_simple_flights(0, []), None)
+
+# mtime of the shared cache file this process last published or loaded
+_shared_mtime = 0
+
+# Single-flight slot for forced rebuilds: the Event of the rebuild in progress, if any.
+# Concurrent forced refreshes wait on it and reuse that result instead of starting their own
+_rebuild_event: Event | None = None
+_rebuild_waiters = 0
+_rebuild_lock = Lock()
+
+
+def is_retryable(exc: Exception) -> bool:
+    """Connection errors, timeouts and throttling/gateway statuses are worth retrying."""
+    if isinstance(exc, (requests.ConnectionError, requests.Timeout)):
+        return True
+    if isinstance(exc, requests.HTTPError) and exc.response is not None:
+        return exc.response.status_code in RETRY_STATUSES
+    return False
+
+
+def is_not_found(exc: Exception) -> bool:
+    """OpenSky's flights endpoints answer an interval with no flights with 404."""
+    if isinstance(exc, requests.HTTPError) and exc.response is not None:
+        return exc.response.status_code == 404
+    return False
+
+
+def read_capped(response: requests.Response, limit: int = MAX_RESPONSE_BYTES) -> bytearray:
+    """Read a streamed response body, giving up as soon as it grows past `limit` bytes.
+    The buffer is returned as is (orjson decodes a bytearray) so the body is never copied.
+    """
+    length = response.headers.get("Content-Length")
+    if length and length.isdigit() and int(length) > limit:
+        raise ValueError(f"OpenSky response of {length} bytes exceeds {limit}")
+    body = bytearray()
+    for chunk in response.iter_content(RESPONSE_CHUNK_SIZE):
+        body += chunk
+        if len(body) > limit:
+            raise ValueError(f"OpenSky response exceeds {limit} bytes")
+    return body
+
+
+def opensky_get(url: str, params: dict, timeout: float = REQUEST_TIMEOUT):
+    """GET an OpenSky endpoint with retries and jittered backoff, behind the circuit breaker.
+    Returns the decoded JSON body; raises on the final failure or while the circuit is open.
+    """
+    if not _breaker.allow():
+        raise CircuitOpenError(f"OpenSky circuit open, skipping {url}")
+
+    for attempt in range(RETRY_ATTEMPTS):
+        try:
+            with _session.get(url, params=params, timeout=timeout, stream=True) as response:
+                response.raise_for_status()
+                body = read_capped(response)
+        except Exception as e:
+            if not is_retryable(e):
+                # Settle the breaker either way, or a half-open probe would leave it stuck: an HTTP
+                # answer (404 "no flights", 401, an over-size body) shows OpenSky is reachable
+                if isinstance(e, requests.RequestException) and not isinstance(e, requests.HTTPError):
+                    _breaker.record_failure()
+                else:
+                    _breaker.record_success()
+                raise
+            if attempt == RETRY_ATTEMPTS - 1:
+                _breaker.record_failure()
+                raise
+            time.sleep(backoff_delay(attempt))
+        else:
+            _breaker.record_success()
+            # Decode straight from the body bytes; orjson skips requests' text decode and stdlib json
+            return orjson.loads(body)
+
+
+def fetch_states_over_turkey():
+    """Fetch aircraft states over Turkey using direct HTTP requests.
+    Returns (time, states), where time is OpenSky's snapshot timestamp. Raises when the
+    states can't be fetched, so callers keep their previous results instead of publishing none.
+    """
+    url = f"{OPENSKY_BASE_URL}/states/all"
+    params = {
+        'lamin': LAT_MIN,
+        'lamax': LAT_MAX,
+        'lomin': LON_MIN,
+        'lomax': LON_MAX,
+    }
+    
+    data = opensky_get(url, params)
+    return data.get('time'), data.get('states') or []
+
+
+def state_field(state: list, index: int):
+    """Read an optional trailing field of an OpenSky state vector."""
+    return state[index] if len(state) > index else None
+
+
+def aircraft_over_turkey(state_vectors) -> Aircraft:
+    """Filter aircraft that are actually inside the Turkish bounding box, as parallel arrays.
+    Duplicate icao24s are dropped and at most MAX_AIRCRAFT_TO_QUERY aircraft are returned.
+    """
+    states = [state for state in state_vectors or [] if len(state) >= 7]
+    # State vectors stay the raw decoded lists; positions go straight into one (N, 2) float
+    # array in a single pass (NumPy stores a missing None as NaN)
+    coords = np.array([(state[5], state[6]) for state in states], dtype=np.float64).reshape(-1, 2)
+    lons, lats = coords[:, 0], coords[:, 1]
+
+    # The airspace is a rectangle by default, so four comparisons replace a polygon test
+    # (NaN positions compare False and drop out on their own)
+    mask = (lons >= LON_MIN) & (lons <= LON_MAX) & (lats >= LAT_MIN) & (lats <= LAT_MAX)
+    if _airspace_polygon is not None:
+        # Only points already inside the box pay for the ray cast
+        candidates = np.flatnonzero(mask)
+        mask[candidates] = points_in_polygon(lons[candidates], lats[candidates], *_airspace_polygon)
+
+    keep = []
+    seen: set[str] = set()
+    # Bind hot lookups to locals so the per-row loop avoids attribute and global lookups
+    keep_append, seen_add, limit = keep.append, seen.add, MAX_AIRCRAFT_TO_QUERY
+    for i in np.flatnonzero(mask).tolist():
+        # OpenSky occasionally repeats a transponder; stop once we have enough to query
+        icao24 = states[i][0]
+        if icao24 in seen:
+            continue
+        seen_add(icao24)
+        keep_append(i)
+        if len(keep) == limit:
+            break
+
+    idx = np.array(keep, dtype=np.intp)
+    picked = [states[i] for i in keep]
+    # Remaining numeric columns for the survivors in one pass: geo altitude, baro altitude,
+    # velocity, heading. Missing values become NaN, then 0 once the altitude fallback is applied.
+    numeric = np.array([
+        (state_field(state, 13), state_field(state, 7), state_field(state, 9), state_field(state, 10))
+        for state in picked
+    ], dtype=np.float64).reshape(-1, 4)
+    geo_alt, baro_alt, velocity, heading = np.nan_to_num(numeric).T
+    return Aircraft(
+        icao24=np.array([state[0] for state in picked], dtype=object),
+        callsign=np.array([(state[1] or "").strip() for state in picked], dtype=object),
+        origin_country=np.array([state[2] for state in picked], dtype=object),
+        lon=lons[idx],
+        lat=lats[idx],
+        altitude=np.where(geo_alt != 0, geo_alt, baro_alt),
+        velocity=velocity,
+        heading=heading,
+    )
+
+
+def touches_israel(f: dict) -> bool:
+    """True if a raw OpenSky flight departs from or arrives at an Israeli airport."""
+    # Runs for every flight in a bulk slice, so the prefix test is inlined rather than called
+    dep = f.get("estDepartureAirport")
+    arr = f.get("estArrivalAirport")
+    return (dep is not None and dep[:2] == ISRAEL_PREFIX) or (arr is not None and arr[:2] == ISRAEL_PREFIX)
+
+
+def summarize_flight(f: dict) -> dict:
+    """Keep the minimal flight fields used by the frontend."""
+    return {
+        "estDepartureAirport": f.get("estDepartureAirport"),
+        "estArrivalAirport": f.get("estArrivalAirport"),
+        "firstSeen": f.get("firstSeen"),
+        "lastSeen": f.get("lastSeen"),
+    }
+
+
+def query_recent_flights(icao24: str, begin_ts: int, end_ts: int):
+    """Query recent flights for an aircraft using direct HTTP requests. Returns Israel flights only,
+    or None when the lookup failed (as opposed to finding nothing).
+    """
+    if not OPENSKY_USERNAME or not OPENSKY_PASSWORD:
+        # Flight history requires authentication
+        return []
+
+    with _flight_cache_lock:
+        cached = _flight_cache.get(icao24)
+    if cached is not None:
+        return cached
+
+    url = f"{OPENSKY_BASE_URL}/flights/aircraft"
+    params = {
+        'icao24': icao24,
+        'begin': begin_ts,
+        'end': end_ts
+    }
+    
+    try:
+        flights = opensky_get(url, params)
+    except Exception as e:
+        if not is_not_found(e):
+            # Real failures stay uncached so the next poll asks again
+            logger.debug(f"Failed to get flights for {icao24}: {e}")
+            return None
+        # No flights in the window is an answer, and worth caching like any other
+        flights = []
+
+    # Filter on the raw records so non-matching flights never allocate a dict
+    out = [summarize_flight(f) for f in flights or [] if touches_israel(f)]
+
+    with _flight_cache_lock:
+        _flight_cache[icao24] = out
+    return out
+
+
+def mark_bulk_failed():
+    """Skip the bulk endpoint for BULK_FAILURE_COOLDOWN instead of paying its timeouts every poll."""
+    with _bulk_flights_lock:
+        _bulk_flights["failed_until"] = time.time() + BULK_FAILURE_COOLDOWN
+
+
+def fetch_flights_slice(begin_ts: int, end_ts: int) -> list[dict]:
+    """Fetch one /flights/all interval (at most FLIGHTS_INTERVAL_MAX long)."""
+    url = f"{OPENSKY_BASE_URL}/flights/all"
+    params = {
+        'begin': begin_ts,
+        'end': end_ts
+    }
+    try:
+        return opensky_get(url, params, timeout=BULK_REQUEST_TIMEOUT) or []
+    except Exception as e:
+        # An empty slice (usually the newest, not yet processed) is not a failure
+        if not is_not_found(e):
+            raise
+        return []
+
+
+def fetch_all_flights_in_window(begin_ts: int, end_ts: int) -> dict[str, list[dict]] | None:
+    """Fetch every Israel flight in the window from /flights/all at once, indexed by icao24.
+    One bulk request per two hours of window replaces a request per aircraft.
+    Returns None when the bulk endpoint is unavailable or has no flights at all, so callers can fall back.
+    """
+    if not OPENSKY_USERNAME or not OPENSKY_PASSWORD:
+        # Flight history requires authentication
+        return None
+
+    with _bulk_flights_lock:
+        now = time.time()
+        if now < _bulk_flights["failed_until"]:
+            return None
+        if _bulk_flights["by_icao"] is not None and now - _bulk_flights["ts"] < POLL_INTERVAL:
+            return _bulk_flights["by_icao"]
+
+    by_icao: dict[str, list[dict]] = defaultdict(list)
+    seen = set()
+    received = 0
+    try:
+        # The slices are independent downloads, so fetch them concurrently rather than back to back
+        slices = [
+            _executor.submit(fetch_flights_slice, start, min(start + FLIGHTS_INTERVAL_MAX, end_ts))
+            for start in range(begin_ts, end_ts, FLIGHTS_INTERVAL_MAX)
+        ]
+        # Merge in window order so the de-duplication below is deterministic
+        for future in slices:
+            flights = future.result()
+            received += len(flights)
+            for f in flights:
+                if not touches_israel(f):
+                    continue
+                # Flights overlapping two slices are returned by both
+                key = (f.get("icao24"), f.get("firstSeen"))
+                if key in seen:
+                    continue
+                seen.add(key)
+                by_icao[f.get("icao24")].append(summarize_flight(f))
+    except Exception as e:
+        logger.debug(f"Bulk flights query failed, falling back to per-aircraft lookups: {e}")
+        mark_bulk_failed()
+        return None
+
+    if not received:
+        # No flights at all in the whole window means the bulk data isn't there yet, not
+        # that nobody flew; let the per-aircraft lookups decide instead
+        logger.debug("Bulk flights query returned nothing, falling back to per-aircraft lookups")
+        mark_bulk_failed()
+        return None
+
+    with _bulk_flights_lock:
+        _bulk_flights["ts"] = time.time()
+        _bulk_flights["by_icao"] = by_icao
+    return by_icao
+
+
+def iter_recent_flights(icao24s, rows, begin_ts: int, end_ts: int):
+    """Yield (row, flights) pairs for the given rows, querying each aircraft's history concurrently.
+    flights is None for lookups that failed.
+    """
+    # Flight lookups are independent network round-trips, so overlap them
+    futures = {
+        _executor.submit(query_recent_flights, icao24s[i], begin_ts, end_ts): i
+        for i in rows
+    }
+    for future in as_completed(futures):
+        i = futures[future]
+        try:
+            flights = future.result()
+        except Exception as e:
+            logger.debug(f"Error querying flights for {icao24s[i]}: {e}")
+            flights = None
+        yield i, flights
+
+
+def build_matching_list():
+    """Build list of aircraft in Turkish airspace with Israeli connections."""
+    # One clock read per poll; every match shares the same timestamp
+    now = time.time()
+    now_iso = datetime.fromtimestamp(now, timezone.utc).isoformat()
+    end_ts = int(now)
+    begin_ts = end_ts - RECENT_WINDOW_HOURS * 3600
+
+    states_time, state_vectors = fetch_states_over_turkey()
+    logger.info(f"Fetched {len(state_vectors)} aircraft over Turkey")
+
+    # OpenSky hasn't produced a new snapshot since the last poll, so nothing can have changed
+    last = _last_states
+    if states_time is not None and states_time == last["time"] and last["results"] is not None:
+        logger.info(f"States unchanged since {states_time}, reusing previous matches")
+        return last["results"]
+
+    aircraft = aircraft_over_turkey(state_vectors)
+    logger.info(f"Found {len(aircraft.icao24)} aircraft in Turkish airspace")
+
+    # Aircraft flying under an Israeli airline callsign or on the Israeli register are
+    # Israel-connected by definition, so they need no flight-history lookup
+    carrier = [
+        callsign[:3] in ISRAEL_CARRIER_PREFIXES or country == "Israel"
+        for callsign, country in zip(aircraft.callsign, aircraft.origin_country)
+    ]
+
+    # Only ask for flight history once the states show there is something new to match
+    need_lookup = not all(carrier)
+    by_icao = fetch_all_flights_in_window(begin_ts, end_ts) if need_lookup else {}
+    if by_icao is not None:
+        aircraft_flights = ((i, by_icao.get(icao24, [])) for i, icao24 in enumerate(aircraft.icao24))
+    else:
+        # Only spend per-aircraft lookups on aircraft the callsign doesn't already settle
+        lookup_rows = [i for i, is_carrier in enumerate(carrier) if not is_carrier]
+        aircraft_flights = chain(
+            ((i, []) for i, is_carrier in enumerate(carrier) if is_carrier),
+            iter_recent_flights(aircraft.icao24, lookup_rows, begin_ts, end_ts),
+        )
+
+    # Convert the columns to native Python values in bulk (C loops), zipped into per-row
+    # tuples, so matches don't box NumPy scalars one field at a time
+    rows = list(zip(
+        aircraft.icao24.tolist(),
+        aircraft.callsign.tolist(),
+        aircraft.lon.tolist(),
+        aircraft.lat.tolist(),
+        aircraft.altitude.astype(np.int64).tolist(),
+        aircraft.velocity.astype(np.int64).tolist(),
+        aircraft.heading.astype(np.int64).tolist(),
+        aircraft.origin_country.tolist(),
+    ))
+
+    # Lookups complete in any order; slotting matches by row keeps the output in state order
+    # so the map list and /api/flights don't reshuffle between polls
+    matched_rows: list[dict | None] = [None] * len(rows)
+    # A build with failed lookups may be missing matches, so it is never reused below
+    degraded = False
+    
+    # Flight lookups only return flights touching an Israeli airport
+    for i, matched_info in aircraft_flights:
+        if matched_info is None:
+            degraded = True
+            matched_info = []
+        # If we have authentication but no matched flights, skip
+        # If we don't have authentication, include all aircraft (fallback mode)
+        if matched_info or carrier[i] or (not OPENSKY_USERNAME):
+            # Response dicts are only materialized for matched rows
+            icao24, callsign, lon, lat, altitude, speed, heading, origin_country = rows[i]
+            matched_rows[i] = {
+                "icao24": icao24,
+                "callsign": callsign,
+                "lon": lon,
+                "lat": lat,
+                "altitude": altitude,
+                "speed": speed,
+                "heading": heading,
+                "origin_country": origin_country,
+                "matched_flights": matched_info,
+                "carrier_match": carrier[i],
+                "timestamp": now,
+                "last_seen": now_iso
+            }
+    matches = [match for match in matched_rows if match is not None]
+    
+    logger.info(f"Found {len(matches)} {'Israeli-connected' if OPENSKY_USERNAME else 'total'} flights")
+    if not degraded:
+        _last_states.update(time=states_time, results=matches)
+    return matches
+
+
+def make_snapshot(ts: float, results: list[dict]) -> CacheSnapshot:
+    """Pre-serialize (and pre-gzip) both API bodies for a set of results."""
+    body = serialize_flights(ts, results)
+    simple_body = serialize_simple_flights(ts, results)
+    return CacheSnapshot(ts, results, body, gzip_body(body), simple_body, gzip_body(simple_body))
+
+
+def write_shared_cache(ts: float, results: list[dict]):
+    """Atomically replace the shared cache file so other workers pick up these results."""
+    global _shared_mtime
+    if SHARED_CACHE_FILE is None:
+        return
+    fd, tmp_path = tempfile.mkstemp(dir=SHARED_CACHE_DIR, prefix=".plane_tracker_cache.")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(orjson.dumps({"ts": ts, "results": results}, option=orjson.OPT_SERIALIZE_NUMPY))
+        os.replace(tmp_path, SHARED_CACHE_FILE)
+        _shared_mtime = os.stat(SHARED_CACHE_FILE).st_mtime_ns
+    except OSError as e:
+        logger.warning(f"Could not write shared cache {SHARED_CACHE_FILE}: {e}")
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+
+
+def load_shared_cache():
+    """Adopt results another worker published to the shared cache file, if they are newer."""
+    global _cache, _shared_mtime
+    if SHARED_CACHE_FILE is None:
+        return
+    try:
+        mtime = os.stat(SHARED_CACHE_FILE).st_mtime_ns
+        if mtime == _shared_mtime:
+            return
+        with open(SHARED_CACHE_FILE, "rb") as f:
+            data = orjson.loads(f.read())
+    except (OSError, orjson.JSONDecodeError):
+        return
+    _shared_mtime = mtime
+    if data["ts"] > _cache.ts:
+        _cache = make_snapshot(data["ts"], data["results"])
+
+
+def cache_snapshot() -> CacheSnapshot:
+    """The currently published cache: results plus both API bodies, plain and gzipped."""
+    load_shared_cache()
+    return _cache
+
+
+def update_cache(results: list[dict]):
+    """Publish fresh results to this worker and, through the shared file, to the others."""
+    global _cache
+    ts = time.time()
+    _cache = make_snapshot(ts, results)
+    write_shared_cache(ts, results)
+
+
+def refresh_cache():
+    """Rebuild and publish the cache now, coalescing concurrent callers into a single rebuild."""
+    global _rebuild_event, _rebuild_waiters
+    with _rebuild_lock:
+        event = _rebuild_event
+        if event is None:
+            event = _rebuild_event = Event()
+            waiters = None
+        else:
+            _rebuild_waiters += 1
+            waiters = _rebuild_waiters
+
+    if waiters is None:
+        try:
+            update_cache(build_matching_list())
+        except Exception as e:
+            # Keep serving the previous snapshot rather than failing the request or blanking it
+            logger.warning(f"Forced refresh failed, keeping cached results: {e}")
+        finally:
+            with _rebuild_lock:
+                _rebuild_event = None
+                _rebuild_waiters = 0
+            event.set()
+        return
+
+    if waiters % 10 == 0:
+        logger.warning(f"{waiters} forced refreshes waiting on the rebuild in progress")
+    # The rebuild in progress publishes to the shared cache; just wait for it to finish
+    if not event.wait(REBUILD_WAIT_TIMEOUT):
+        logger.warning("Timed out waiting for rebuild in progress, serving cached results")
+
+
+def background_poller():
+    """Background thread to continuously poll for flight data."""
+    sleep_s = POLL_INTERVAL
+    logger.info("Starting background poller")
+    
+    while True:
+        try:
+            new_results = build_matching_list()
+            update_cache(new_results)
+            sleep_s = POLL_INTERVAL  # reset on success
+            logger.info(f"Updated cache with {len(new_results)} flights")
+        except Exception as e:
+            # The previous snapshot stays published until a poll succeeds again
+            if isinstance(e, CircuitOpenError):
+                logger.warning(f"Background poller skipped: {e}")
+            else:
+                logger.exception("Background poller error: %s", e)
+            # back off a bit on errors
+            sleep_s = min(max(int(sleep_s * 1.5), POLL_INTERVAL), 120)
+        time.sleep(sleep_s)
+
+
+def poll_when_elected():
+    """Block until this process holds the poller lock, then poll for as long as it lives.
+    Each worker runs this; the lock is released when its holder exits, so another takes over.
+    Without SHARED_CACHE_DIR there is nothing to share, so every process simply polls.
+    """
+    if POLLER_LOCK_FILE is None:
+        background_poller()
+        return
+    try:
+        lock_file = open(POLLER_LOCK_FILE, "a")
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+    except OSError as e:
+        logger.warning(f"Could not take poller lock {POLLER_LOCK_FILE}, polling anyway: {e}")
+    background_poller()
+
+
+def start_poller():
+    """Start the background polling thread; only one process per SHARED_CACHE_DIR polls at a time.
+    Called from the entry points (`python app.py`, gunicorn's post_fork hook), never on import.
+    """
+    Thread(target=poll_when_elected, daemon=True).start()